@@ -0,0 +1,63 @@
+"""Training workload for the PGO polars build (see `make pgo-polars`).
+
+Exercises every mutator against a synthetic in-memory database so the
+instrumented polars build collects profiles on the code paths nullus
+actually uses. Never touches the real task database.
+"""
+
+import contextlib
+import io
+import random
+import sqlite3
+
+from nullus.main import (
+    add_task,
+    dump_tasks,
+    init_db,
+    list_tasks,
+    parse_ids_series,
+    pin_task,
+    prune_done,
+    purge,
+    schedule_task,
+    set_deadline,
+    tag_tasks,
+    toggle_delete,
+    toggle_done,
+    update_task,
+)
+
+NUM_TASKS = 10_000
+
+
+def main() -> None:
+    random.seed(0)
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON")
+
+    init_db(conn)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        add_task([f"task number {i}" for i in range(NUM_TASKS)], conn)
+
+        some_ids = random.sample(range(1, NUM_TASKS + 1), 100)
+
+        tag_tasks(some_ids[:10], "work,home", conn)
+        pin_task(some_ids, conn)
+        toggle_done(some_ids, conn)
+        schedule_task("2026-01-01", parse_ids_series([str(i) for i in some_ids]), conn)
+        set_deadline("2026-06-30", parse_ids_series([str(i) for i in some_ids]), conn)
+        update_task(some_ids[0], "updated description", conn)
+        toggle_delete(some_ids[:50], conn)
+        list_tasks(conn, "number 42")
+        list_tasks(conn, "number (1|2)3")
+        dump_tasks(conn)
+        prune_done(conn)
+        purge(some_ids[:10], conn)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import re
 import sqlite3
 import uuid
 from datetime import datetime
@@ -10,18 +11,22 @@ from typing import cast
 
 import polars as pl
 
-SCHEMA = {
-    "id": pl.Int64,
-    "perma_id": pl.String,
-    "status": pl.String,
-    "desc": pl.String,
-    "scheduled": pl.String,
-    "deadline": pl.String,
-    "created": pl.String,
-    "is_visible": pl.Boolean,
-    "is_pin": pl.Boolean,
-    "done_date": pl.String,
-}
+SCHEMA = pl.Schema(
+    {
+        "id": pl.Int64,
+        "perma_id": pl.String,
+        "status": pl.String,
+        "desc": pl.String,
+        "scheduled": pl.String,
+        "deadline": pl.String,
+        "created": pl.String,
+        "is_visible": pl.Boolean,
+        "is_pin": pl.Boolean,
+        "done_date": pl.String,
+    },
+)
+
+VIEW_SCHEMA = SCHEMA | {"tag_desc": pl.String}
 
 
 def load_tasks(conn: sqlite3.Connection) -> pl.LazyFrame:
@@ -39,11 +44,9 @@ def save_tasks(tasks: pl.LazyFrame, conn: sqlite3.Connection) -> None:
 
     cursor.execute("DELETE FROM tasks")
 
-    for row in tasks.collect().iter_rows():
-        cursor.execute(
-            f"INSERT INTO tasks (id, perma_id, status, desc, scheduled, deadline, created, is_visible, is_pin, done_date) VALUES ({','.join(['?' for _ in row])})",
-            row,
-        )
+    query = f"INSERT INTO tasks ({','.join(SCHEMA)}) VALUES ({','.join('?' for _ in SCHEMA)})"
+
+    cursor.executemany(query, tasks.collect().iter_rows())
 
 
 def add_task(new_tasks: list[str], conn: sqlite3.Connection) -> None:
@@ -51,6 +54,8 @@ def add_task(new_tasks: list[str], conn: sqlite3.Connection) -> None:
 
     num_new_tasks = len(new_tasks)
 
+    created = datetime.now().isoformat()
+
     new_tasks_frame = pl.DataFrame(
         {
             "perma_id": [str(uuid.uuid4()) for _ in range(num_new_tasks)],
@@ -58,7 +63,7 @@ def add_task(new_tasks: list[str], conn: sqlite3.Connection) -> None:
             "desc": [t.capitalize() for t in new_tasks],
             "scheduled": [None] * num_new_tasks,
             "deadline": [None] * num_new_tasks,
-            "created": [datetime.now().isoformat()] * num_new_tasks,
+            "created": [created] * num_new_tasks,
             "is_visible": [True] * num_new_tasks,
             "is_pin": [False] * num_new_tasks,
             "done_date": [None] * num_new_tasks,
@@ -127,15 +132,12 @@ def tag_tasks(task_ids: list[int], str_tags: str, conn: sqlite3.Connection) -> N
 
 
 def pin_task(task_ids: list[int], conn: sqlite3.Connection) -> None:
+    ids = pl.Series("ids", task_ids, dtype=pl.Int64)
+
     tasks = load_tasks(conn)
 
     tasks = tasks.with_columns(
-        pl.when(pl.col("id").is_in(task_ids), pl.col("is_pin"))
-        .then(pl.lit(False))
-        .when(pl.col("id").is_in(task_ids), ~(pl.col("is_pin")))
-        .then(pl.lit(True))
-        .otherwise(pl.col("is_pin"))
-        .alias("is_pin"),
+        (pl.col("is_pin") ^ pl.col("id").is_in(ids.implode())).alias("is_pin"),
     )
 
     save_tasks(tasks, conn)
@@ -144,15 +146,12 @@ def pin_task(task_ids: list[int], conn: sqlite3.Connection) -> None:
 
 
 def toggle_delete(task_ids: list[int], conn: sqlite3.Connection) -> None:
+    ids = pl.Series("ids", task_ids, dtype=pl.Int64)
+
     tasks = load_tasks(conn)
 
     tasks = tasks.with_columns(
-        pl.when(pl.col("id").is_in(task_ids), pl.col("is_visible"))
-        .then(pl.lit(False))
-        .when(pl.col("id").is_in(task_ids), ~(pl.col("is_visible")))
-        .then(pl.lit(True))
-        .otherwise(pl.col("is_visible"))
-        .alias("is_visible"),
+        (pl.col("is_visible") ^ pl.col("id").is_in(ids.implode())).alias("is_visible"),
     )
 
     tasks = reindex(tasks)
@@ -163,28 +162,28 @@ def toggle_delete(task_ids: list[int], conn: sqlite3.Connection) -> None:
 
 
 def toggle_done(task_ids: list[int], conn: sqlite3.Connection) -> None:
+    ids = pl.Series("ids", task_ids, dtype=pl.Int64)
+
     tasks = load_tasks(conn)
 
+    toggled = pl.col("id").is_in(ids.implode())
+    was_done = pl.col("status") == "DONE"
+
     tasks = tasks.with_columns(
-        pl.when(pl.col("id").is_in(task_ids), pl.col("status") == "DONE")
+        pl.when(toggled, was_done)
         .then(pl.lit(None))
-        .when(pl.col("id").is_in(task_ids), ~(pl.col("status") == "DONE"))
+        .when(toggled, ~was_done)
         .then(pl.lit(datetime.now().date().isoformat()))
         .otherwise(pl.col("done_date"))
         .alias("done_date"),
-    )
-
-    tasks = tasks.with_columns(
-        pl.when(pl.col("id").is_in(task_ids), pl.col("status") == "DONE")
+        pl.when(toggled, was_done)
         .then(pl.lit("TODO"))
-        .when(pl.col("id").is_in(task_ids), ~(pl.col("status") == "DONE"))
+        .when(toggled, ~was_done)
         .then(pl.lit("DONE"))
         .otherwise(pl.col("status"))
         .alias("status"),
-    )
-
-    tasks = tasks.with_columns(
-        pl.when(pl.col("status") != "DONE", pl.col("id").is_in(task_ids))
+        # A toggled task ends up as TODO iff it was DONE; resurface it.
+        pl.when(toggled, was_done)
         .then(pl.lit(True))
         .otherwise(pl.col("is_visible"))
         .alias("is_visible"),
@@ -195,10 +194,10 @@ def toggle_done(task_ids: list[int], conn: sqlite3.Connection) -> None:
     list_tasks(conn)
 
 
-def schedule_task(date: str, task_ids: list[int], conn: sqlite3.Connection) -> None:
+def schedule_task(date: str, task_ids: pl.Series, conn: sqlite3.Connection) -> None:
     tasks = load_tasks(conn)
     tasks = tasks.with_columns(
-        pl.when(pl.col("id").is_in(task_ids))
+        pl.when(pl.col("id").is_in(task_ids.implode()))
         .then(pl.lit(date))
         .otherwise(pl.col("scheduled"))
         .alias("scheduled"),
@@ -223,10 +222,10 @@ def update_task(task_id: int, new_desc: str, conn: sqlite3.Connection) -> None:
     list_tasks(conn)
 
 
-def set_deadline(date: str, task_ids: list[int], conn: sqlite3.Connection) -> None:
+def set_deadline(date: str, task_ids: pl.Series, conn: sqlite3.Connection) -> None:
     tasks = load_tasks(conn)
     tasks = tasks.with_columns(
-        pl.when(pl.col("id").is_in(task_ids))
+        pl.when(pl.col("id").is_in(task_ids.implode()))
         .then(pl.lit(date))
         .otherwise(pl.col("deadline"))
         .alias("deadline"),
@@ -243,8 +242,8 @@ def reindex(tasks: pl.LazyFrame) -> pl.LazyFrame:
             ["is_visible", "is_pin", "status", "scheduled", "deadline"],
             descending=[True, True, True, False, False],
         )
-        .drop("id", strict=False)
-        .with_row_index("id", offset=1)
+        .with_columns(pl.int_range(1, pl.len() + 1, dtype=pl.Int64).alias("id"))
+        .select(list(SCHEMA))
     )
 
 
@@ -277,17 +276,22 @@ def purge(task_ids: list[int], conn: sqlite3.Connection) -> None:
         cursor.execute("DELETE FROM task_tag WHERE task_perma_id = ?", [task_perma_id])
 
     tasks = load_tasks(conn)
-    tasks = tasks.filter(~pl.col("id").is_in(task_ids))
+    tasks = tasks.filter(
+        ~pl.col("id").is_in(pl.Series("ids", task_ids, dtype=pl.Int64).implode()),
+    )
     tasks = reindex(tasks)
     save_tasks(tasks, conn)
     list_tasks(conn)
 
 
-def load_view(conn: sqlite3.Connection) -> pl.DataFrame:
+def load_view(conn: sqlite3.Connection, *, only_visible: bool = False) -> pl.DataFrame:
     query = "SELECT * FROM tasks_with_tag"
 
+    if only_visible:
+        query += " WHERE is_visible = 1"
+
     tasks = pl.read_database(
-        query=query, connection=conn, schema_overrides=SCHEMA | {"tag_desc": pl.String}
+        query=query, connection=conn, schema_overrides=VIEW_SCHEMA
     )
 
     concat_task_tag = (
@@ -310,10 +314,16 @@ def dump_tasks(conn: sqlite3.Connection, regex: str | None = None) -> None:
     if regex:
         regex = regex.lower()
 
+        # Plain substrings (no regex metacharacters) take the faster
+        # literal search kernel instead of compiling a regex.
+        is_literal = re.escape(regex) == regex
+
         task_to_print = task_to_print.filter(
-            pl.concat_str(pl.all().cast(pl.String), ignore_nulls=True)
-            .str.to_lowercase()
-            .str.contains(regex),
+            pl.any_horizontal(
+                pl.col("desc", "status", "tags")
+                .str.to_lowercase()
+                .str.contains(regex, literal=is_literal),
+            ),
         )
 
     with pl.Config(
@@ -327,17 +337,24 @@ def dump_tasks(conn: sqlite3.Connection, regex: str | None = None) -> None:
 
 
 def list_tasks(conn: sqlite3.Connection, regex: str | None = None) -> None:
-    tasks = load_view(conn).sort(["is_pin", "id"], descending=[True, False])
-
-    task_to_print = tasks.filter(pl.col("is_visible"))
+    task_to_print = load_view(conn, only_visible=True).sort(
+        ["is_pin", "id"],
+        descending=[True, False],
+    )
 
     if regex:
         regex = regex.lower()
 
+        # Plain substrings (no regex metacharacters) take the faster
+        # literal search kernel instead of compiling a regex.
+        is_literal = re.escape(regex) == regex
+
         task_to_print = task_to_print.filter(
-            pl.concat_str(pl.all().cast(pl.String), ignore_nulls=True)
-            .str.to_lowercase()
-            .str.contains(regex),
+            pl.any_horizontal(
+                pl.col("desc", "status", "tags")
+                .str.to_lowercase()
+                .str.contains(regex, literal=is_literal),
+            ),
         )
 
     if not task_to_print.is_empty():
@@ -348,7 +365,7 @@ def list_tasks(conn: sqlite3.Connection, regex: str | None = None) -> None:
             set_tbl_hide_dataframe_shape=True,
             set_fmt_str_lengths=80,
         ):
-            if any(task_to_print["is_pin"]):
+            if task_to_print["is_pin"].any():
                 task_to_print = task_to_print.with_columns(
                     pl.when(pl.col("is_pin"))
                     .then(pl.lit("*"))
@@ -361,18 +378,14 @@ def list_tasks(conn: sqlite3.Connection, regex: str | None = None) -> None:
             else:
                 show_cols = ["id", "status", "desc", "tags"]
 
-            task_to_print = task_to_print.with_columns(
-                pl.all().cast(pl.String).fill_null(""),
-            )
-
-            if any(task_to_print["scheduled"]):
+            if task_to_print["scheduled"].is_not_null().any():
                 show_cols.append("scheduled")
 
-            if any(task_to_print["deadline"]):
+            if task_to_print["deadline"].is_not_null().any():
                 show_cols.append("deadline")
 
             task_to_print = task_to_print.select(show_cols).with_columns(
-                pl.all().fill_null("")
+                pl.all().cast(pl.String).fill_null(""),
             )
 
             print(task_to_print)
@@ -385,6 +398,12 @@ def parse_list_of_int(list_of_int: list[str]) -> list[int]:
     return [int(s) for s in list_of_int]
 
 
+def parse_ids_series(list_of_int: list[str]) -> pl.Series:
+    # The explicit dtype keeps an empty list from inferring Null,
+    # which str.to_integer rejects.
+    return pl.Series("ids", list_of_int, dtype=pl.String).str.to_integer(base=10)
+
+
 def init_db(conn: sqlite3.Connection) -> None:
     cursor = conn.cursor()
 
@@ -576,13 +595,11 @@ def main() -> None:
 
     if args.schedule:
         date, *task_ids = args.schedule
-        task_ids = parse_list_of_int(task_ids)
-        schedule_task(date, task_ids, conn)
+        schedule_task(date, parse_ids_series(task_ids), conn)
 
     if args.deadline:
         date, *task_ids = args.deadline
-        task_ids = parse_list_of_int(task_ids)
-        set_deadline(date, task_ids, conn)
+        set_deadline(date, parse_ids_series(task_ids), conn)
 
     if args.prune:
         prune_done(conn)